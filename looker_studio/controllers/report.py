@@ -1,127 +1,248 @@
-from odoo import http
+from odoo import fields, http
 from odoo.http import request
-from odoo.tools.safe_eval import safe_eval
+from collections import OrderedDict
+import hashlib
 import json
+import threading
+import time
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumps(obj):
+        # compact separators, matching orjson output
+        return json.dumps(obj, separators=(',', ':'))
+
+# Serialized chart payloads keyed by report identity, write_date, company,
+# language, timezone, day and domain (labels are translated and buckets are
+# computed in the context timezone). Entries also carry a time bucket so data
+# edited outside the report (new leads/orders) shows up after at most one TTL
+# period.
+_CHART_CACHE_SIZE = 256
+_CHART_CACHE_TTL = 60  # seconds
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+_CHART_KEYS = ('labels', 'count_values', 'sum_values', 'line_labels', 'line_values')
+
+
+def _cached_chart_payload(report, domain, include_timeseries=True):
+    """Return (data, dumped) for a report, reusing a recent serialization.
+
+    `data` is the dict from report.get_chart_data() and `dumped` maps the same
+    keys to their JSON strings. Both are shared between requests and must not
+    be mutated by callers. `include_timeseries` is passed through and is part
+    of the cache key.
+    """
+    key = (
+        report.env.cr.dbname, report._name, report.id, str(report.write_date),
+        report.env.company.id, report.env.lang, report.env.context.get('tz'),
+        fields.Date.context_today(report), repr(domain), include_timeseries, int(time.monotonic() // _CHART_CACHE_TTL),
+    )
+    with _chart_cache_lock:
+        hit = _chart_cache.get(key)
+        if hit is not None:
+            _chart_cache.move_to_end(key)
+            return hit
+    data = report.get_chart_data(include_timeseries=include_timeseries)
+    # empty arrays (e.g. no time-series) do not need an encoder call
+    dumped = {k: (_dumps(data[k]) if data.get(k) else '[]') for k in _CHART_KEYS}
+    with _chart_cache_lock:
+        _chart_cache[key] = (data, dumped)
+        while len(_chart_cache) > _CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+    return data, dumped
+
+
+def _valid_domain(domain):
+    """Return True when `domain` has the shape of an Odoo domain.
+
+    Only the structure is checked (operators as strings, leaves as 3-item
+    lists/tuples); field names are left to the ORM. Used to skip queries for
+    misconfigured domains instead of letting PostgreSQL reject them.
+    """
+    return isinstance(domain, (list, tuple)) and all(
+        isinstance(x, str) or (isinstance(x, (list, tuple)) and len(x) == 3)
+        for x in domain
+    )
 
 
 class LookerReportController(http.Controller):
+    def _summary_stats(self, Model, domain, success_dom, value_field=None):
+        """Return (total, total_value, success) for the stats table.
+
+        Count and sum come from a single aggregate read_group; the success
+        count needs a second read_group only when a success domain is set.
+        Without a value field the total value falls back to the record count,
+        mirroring the chart data.
+        """
+        if not _valid_domain(domain):
+            return 0, 0.0, 0
+        try:
+            rows = Model.read_group(domain, ['%s:sum' % value_field] if value_field else [], [], lazy=False)
+            base = rows[0] if rows else {}
+        except Exception:
+            base = {}
+        total = base.get('__count', 0)
+        total_value = (base.get(value_field) or 0.0) if value_field else total
+        success = 0
+        if success_dom and _valid_domain(success_dom):
+            try:
+                success_full = list(domain) + list(success_dom)
+                rows = Model.read_group(success_full, [], [], lazy=False)
+                success = rows[0].get('__count', 0) if rows else 0
+            except Exception:
+                success = 0
+        return total, total_value, success
+
+    def _preview_etag(self, report):
+        """Return an ETag for a report preview.
+
+        The rendered page depends on the report definition, the viewing user,
+        their language and the underlying records, so the tag combines
+        write_date, the user, the language and the chart cache time bucket
+        (wall clock, to agree across workers).
+        """
+        raw = '%s-%s-%s-%s-%s-%s' % (
+            report._name, report.id, report.write_date, request.env.user.id,
+            request.env.lang, int(time.time() // _CHART_CACHE_TTL),
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def _not_modified(self, etag):
+        """Return a 304 response when the browser already holds `etag`."""
+        if etag in request.httprequest.if_none_match:
+            response = request.make_response('', status=304)
+            response.set_etag(etag)
+            return response
+        return None
+
+    def _cacheable(self, response, etag):
+        """Tag a rendered preview so browsers can revalidate it cheaply."""
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=%d' % _CHART_CACHE_TTL
+        return response
+
+    def _build_context(self, report, data, dumped, stats, probability_values, line_is_percentage=0, probability_as_line=False):
+        """Assemble the QWeb context shared by both report templates.
+
+        `stats` is (total, success, success_pct, total_value, avg_value).
+        Every JSON string is dumped once and reused where several context
+        keys expose the same data. With `probability_as_line` the side line
+        chart is fed with the per-category values instead of the time-series.
+        """
+        total, success, success_pct, total_value, avg_value = stats
+        probability_json = _dumps(probability_values)
+        return {
+            'report': report,
+            'labels_json': dumped['labels'],
+            'counts_json': dumped['count_values'],
+            'sums_json': dumped['sum_values'],
+            'line_labels_json': dumped['line_labels'],
+            'line_values_json': probability_json if probability_as_line else dumped['line_values'],
+            'line_is_percentage': line_is_percentage,
+            'stat_total_leads': total,
+            'stat_success_leads': success,
+            'stat_success_pct': success_pct,
+            'stat_total_value': total_value,
+            'stat_avg_value': avg_value,
+            'probability_json': probability_json,
+            # Raw lists for the tables, so templates do not re-parse the JSON above
+            'labels': data.get('labels', []),
+            'counts': data.get('count_values', []),
+            'sums': data.get('sum_values', []),
+            # Some simpler templates expect `values_json` (single dataset); expose counts as values
+            'values_json': dumped['count_values'],
+        }
+
     @http.route('/looker_studio/report/<int:report_id>', type='http', auth='user', website=True)
     def render_report(self, report_id, **kwargs):
         report = request.env['looker_studio.report'].sudo().browse(report_id)
-        if not report.exists():
+        # one SELECT both checks existence and prefetches what the endpoint reads;
+        # read() silently drops deleted ids, so an empty result means not found
+        if not report.read(['domain', 'success_domain', 'group_field', 'value_field', 'show_probability', 'write_date']):
             return request.not_found()
-        data = report.get_chart_data()
+        etag = self._preview_etag(report)
+        not_modified = self._not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        domain = report._eval_domain()
+        # evaluated once and shared by every aggregate below
+        base_domain = list(domain)
+        # the template's line chart shows per-category probability, not the 14-day series
+        data, dumped = _cached_chart_payload(report, base_domain, include_timeseries=False)
         # determine if success_domain is a valid non-empty domain list
         line_is_percentage = 0
         success_dom = []
-        if report.success_domain:
-            try:
-                sd = safe_eval(report.success_domain) or []
-                success_dom = sd
-                line_is_percentage = 1 if sd else 0
-            except Exception:
-                line_is_percentage = 0
+        sd = report._eval_success_domain()
+        if sd and _valid_domain(sd):
+            success_dom = sd
+            line_is_percentage = 1
 
         # compute a few summary statistics for the small stats table
         Model = request.env['crm.lead'].sudo()
-        domain = report._eval_domain()
         labels = data.get('labels', [])
-        counts = data.get('count_values', [])
-        sums = data.get('sum_values', [])
-        total_leads = sum(counts) if counts else Model.search_count(domain)
-        total_value = sum(sums) if sums else 0.0
-        success_leads = 0
-        try:
-            if success_dom:
-                success_leads = Model.search_count(list(domain) + list(success_dom))
-            else:
-                success_leads = 0
-        except Exception:
-            success_leads = 0
+        total_leads, total_value, success_leads = self._summary_stats(Model, base_domain, success_dom, report.value_field)
         success_pct = round((float(success_leads) / float(total_leads) * 100.0), 1) if total_leads else 0.0
         avg_value = round((float(total_value) / float(total_leads)), 2) if total_leads and total_value else 0.0
 
         # Calculate average Probability (Xác suất AI) per category for the line chart
         probability_values = []
-        if report.group_field:
+        if not report.show_probability:
+            # the template hides the probability chart; skip its aggregate entirely
+            pass
+        elif not _valid_domain(base_domain) or (report.group_field and report.group_field not in Model._fields):
+            # misconfigured report: skip the query rather than letting the ORM reject it
+            probability_values = [0.0] * len(labels) if labels else [0.0]
+        elif report.group_field:
             try:
                 group_field = report.group_field
-                # Get all groups to match with labels
-                all_groups = Model.read_group(domain, [group_field], [group_field], lazy=False)
-                group_id_map = {}  # label -> group_id
+                # Average probability per group, aggregated by PostgreSQL in one query
+                all_groups = Model.read_group(base_domain, [group_field, 'probability:avg'], [group_field], lazy=False)
+                # chart labels are already strings, so key the averages by label directly
+                avg_map = {}  # label -> average probability
                 for g in all_groups:
                     key = g.get(group_field)
-                    gid = key[0] if isinstance(key, (list, tuple)) else key
                     label = key[1] if isinstance(key, (list, tuple)) and len(key) > 1 else (key or 'Undefined')
-                    group_id_map[str(label)] = gid
-                
-                # Calculate average probability for each category
-                for i, label in enumerate(labels):
-                    group_id = group_id_map.get(str(label))
-                    if group_id:
-                        # Build domain for this specific category
-                        category_domain = list(domain) + [(group_field, '=', group_id)]
-                        # Get all leads in this category
-                        category_leads = Model.search(category_domain)
-                        if category_leads:
-                            # Calculate average probability
-                            total_prob = sum(lead.probability or 0.0 for lead in category_leads)
-                            avg_prob = total_prob / len(category_leads)
-                            probability_values.append(round(avg_prob, 1))
-                        else:
-                            probability_values.append(0.0)
-                    else:
-                        probability_values.append(0.0)
+                    avg_map[label if isinstance(label, str) else str(label)] = g.get('probability') or 0.0
+
+                probability_values = [round(avg_map.get(label, 0.0), 1) for label in labels]
             except Exception:
                 probability_values = [0.0] * len(labels)
         else:
             # If no group_field, calculate overall average probability
             try:
-                leads = Model.search(domain)
-                if leads:
-                    avg_prob = sum(lead.probability or 0.0 for lead in leads) / len(leads)
-                    probability_values = [round(avg_prob, 1)]
-                else:
-                    probability_values = [0.0]
+                rows = Model.read_group(base_domain, ['probability:avg'], [], lazy=False)
+                avg_prob = (rows[0].get('probability') if rows else 0.0) or 0.0
+                probability_values = [round(avg_prob, 1)]
             except Exception:
                 probability_values = [0.0] * len(labels) if labels else [0.0]
 
-        context = {
-            'report': report,
-            'labels_json': json.dumps(labels),
-            'counts_json': json.dumps(counts),
-            'sums_json': json.dumps(sums),
-            'line_labels_json': json.dumps(data.get('line_labels', [])),
-            'line_values_json': json.dumps(data.get('line_values', [])),
-            'line_is_percentage': line_is_percentage,
-            'stat_total_leads': total_leads,
-            'stat_success_leads': success_leads,
-            'stat_success_pct': success_pct,
-            'stat_total_value': total_value,
-            'stat_avg_value': avg_value,
-            'probability_json': json.dumps(probability_values),
-            # Provide the json module to templates so they can call json.loads(...)
-            'json': json,
-            # Some simpler templates expect `values_json` (single dataset); expose counts as values
-            'values_json': json.dumps(counts),
-        }
+        stats = (total_leads, success_leads, success_pct, total_value, avg_value)
+        context = self._build_context(report, data, dumped, stats, probability_values, line_is_percentage)
         # Always render the modern 3-chart template on Preview (pie, line, bar)
-        return request.render('looker_studio.report_modern_template', context)
+        return self._cacheable(request.render('looker_studio.report_modern_template', context), etag)
 
     @http.route('/looker_studio/order_report/<int:report_id>', type='http', auth='user', website=True)
     def render_order_report(self, report_id, **kwargs):
         report = request.env['looker_studio.order_report'].sudo().browse(report_id)
-        if not report.exists():
+        if not report.read(['domain', 'group_field', 'value_field', 'write_date']):
             return request.not_found()
-        data = report.get_chart_data()
+        etag = self._preview_etag(report)
+        not_modified = self._not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        domain = report._eval_domain()
+        # the side line chart shows per-category averages, not the 14-day series
+        data, dumped = _cached_chart_payload(report, domain, include_timeseries=False)
 
         Model = request.env['sale.order'].sudo()
-        domain = report._eval_domain()
         labels = data.get('labels', [])
         counts = data.get('count_values', [])
         sums = data.get('sum_values', [])
-        total_orders = sum(counts) if counts else Model.search_count(domain)
-        total_amount = sum(sums) if sums else 0.0
+        total_orders, total_amount, _success = self._summary_stats(Model, domain, [], report.value_field)
         avg_amount = round((float(total_amount) / float(total_orders)), 2) if total_orders and total_amount else 0.0
 
         # probability_json not meaningful for orders; reuse field for a simple metric line if needed
@@ -137,28 +258,13 @@ class LookerReportController(http.Controller):
                     else:
                         probability_values.append(float(s))
             else:
-                # Fallback: use the time-series line_values if available (may be empty)
+                # Fallback: use the time-series line_values if available (empty for the preview, which skips it)
                 probability_values = data.get('line_values', []) or []
         except Exception:
             probability_values = data.get('line_values', []) or []
 
-        context = {
-            'report': report,
-            'labels_json': json.dumps(labels),
-            'counts_json': json.dumps(counts),
-            'sums_json': json.dumps(sums),
-            'line_labels_json': json.dumps(data.get('line_labels', [])),
-            # For order template, line_values_json is used by the small side chart — provide per-category stats
-            'line_values_json': json.dumps(probability_values),
-            'line_is_percentage': 0,
-            'stat_total_leads': total_orders,
-            'stat_success_leads': 0,
-            'stat_success_pct': 0.0,
-            'stat_total_value': total_amount,
-            'stat_avg_value': avg_amount,
-            'probability_json': json.dumps(probability_values),
-            'json': json,
-            'values_json': json.dumps(counts),
-        }
+        # For order template, line_values_json is used by the small side chart — provide per-category stats
+        stats = (total_orders, 0, 0.0, total_amount, avg_amount)
+        context = self._build_context(report, data, dumped, stats, probability_values, probability_as_line=True)
         # Render order-specific template with sales-appropriate labels
-        return request.render('looker_studio.report_order_template', context)
\ No newline at end of file
+        return self._cacheable(request.render('looker_studio.report_order_template', context), etag)
\ No newline at end of file
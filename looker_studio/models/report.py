@@ -1,10 +1,282 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
 from odoo.tools.safe_eval import safe_eval
 from odoo.exceptions import UserError
+from collections import OrderedDict
+from datetime import date, timedelta
+from operator import itemgetter
+import functools
+import heapq
 import logging
+import psycopg2
+import pytz
+import sys
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Auto-generated description templates (Vietnamese), shared by both report models
+_DESCRIPTION_KEYS = ('pie_description', 'bar_description', 'line_description')
+_FILTER_SUFFIX = ' (có áp dụng bộ lọc)'
+_BAR_TMPL_GV = 'Tổng %s theo %s.'
+_BAR_TMPL_NONE = 'Giá trị theo danh mục.'
+_LINE_TMPL_V = 'Xu hướng tổng %s theo ngày trong 14 ngày gần nhất%s.'
+_CRM_PIE_TMPL = 'Phân bố khách hàng tiềm năng theo %s.'
+_CRM_PIE_NONE = 'Phân bố khách hàng tiềm năng.'
+_CRM_BAR_TMPL_G = 'Số lượng khách hàng tiềm năng theo %s.'
+_CRM_LINE_TMPL_NOV = 'Xu hướng số lượng khách hàng tiềm năng trong 14 ngày gần nhất%s.'
+_CRM_LINE_TMPL_SUCCESS = 'Xu hướng tỷ lệ phần trăm khách hàng tiềm năng theo ngày trong 14 ngày gần nhất%s.'
+_ORDER_PIE_TMPL = 'Phân bố đơn hàng theo %s.'
+_ORDER_PIE_NONE = 'Phân bố đơn hàng.'
+_ORDER_BAR_TMPL_G = 'Số lượng đơn hàng theo %s.'
+_ORDER_LINE_TMPL_NOV = 'Xu hướng số lượng đơn hàng trong 14 ngày gần nhất%s.'
+_WEEKDAY_LABELS_VI = ('Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ Nhật')
+
+# Reports whose chart queries failed, keyed by (db, model, id, write_date,
+# include_groups, include_timeseries) with the monotonic time until which
+# the empty payload is served. Expired entries are dropped when looked up
+# and the map is size-capped like the controller's chart cache, since every
+# edit of a failing report adds a key.
+_BROKEN_REPORT_TTL = 300  # seconds
+_BROKEN_REPORTS_SIZE = 256
+_broken_reports = OrderedDict()
+_broken_reports_lock = threading.Lock()
+
+
+def _empty_chart_data():
+    return {'labels': [], 'count_values': [], 'sum_values': [], 'line_labels': [], 'line_values': []}
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_domain(text):
+    """Evaluate a domain string once per distinct text.
+
+    safe_eval of a literal domain is deterministic, so the source text is a
+    sufficient cache key and edits simply produce a new entry. The result is
+    a tuple so cached values cannot be mutated by callers.
+    """
+    return tuple(safe_eval(text) or []) if text else ()
+
+
+def _read_top_groups(Model, domain, groupby, aggregates, value_field=None, limit=0):
+    """Return `_read_group` rows, trimmed to the `limit` largest groups.
+
+    Groups keep their natural order (e.g. stage sequence) unless there are
+    more than `limit` of them: a first read of `limit + 1` rows in that
+    order tells whether trimming is needed, and only then does PostgreSQL
+    order by the sum (or count) and cut at `limit`. Time-ordered groupbys
+    (`field:granularity`) are put back in time order after the cut.
+    """
+    if not limit:
+        return Model._read_group(domain, [groupby], aggregates)
+    groups = Model._read_group(domain, [groupby], aggregates, limit=limit + 1)
+    if len(groups) <= limit:
+        return groups
+    order = '%s:sum desc' % value_field if value_field else '__count desc'
+    groups = Model._read_group(domain, [groupby], aggregates, order=order, limit=limit)
+    if ':' in groupby:
+        # empty dates last, like the natural order
+        groups = sorted(groups, key=lambda row: (not row[0], row[0] or 0))
+    return groups
+
+
+def _group_label(env, key):
+    """Return the chart label of a `_read_group` group value.
+
+    Many2one groups come back as records and date groups as month starts;
+    both are rendered the way the public read_group labels them. Labels are
+    interned: the same few names repeat across every cached payload.
+    """
+    if isinstance(key, str):
+        return sys.intern(key) if key else 'Undefined'
+    if isinstance(key, models.BaseModel):
+        return sys.intern(key.display_name) if key.display_name else 'Undefined'
+    if isinstance(key, date):
+        return sys.intern(tools.format_date(env, key, date_format='MMMM yyyy'))
+    return sys.intern(str(key)) if key else 'Undefined'
+
+
+def _group_columns(env, groups, sum_field=None):
+    """Split `(group, count[, sum])` rows from _read_group into chart columns.
+
+    Returns `(labels, count_values, sum_values)`, each built in one pass.
+    `sum_field` is the summed Field object, if any; float and monetary sums are
+    used as returned, while counts and integer sums are converted to float.
+    Without a value field the sums repeat the counts.
+    """
+    labels = [_group_label(env, row[0]) for row in groups]
+    count_values = [row[1] for row in groups]
+    if not sum_field:
+        sum_values = [float(row[1]) for row in groups]
+    elif sum_field.type in ('float', 'monetary'):
+        sum_values = [row[2] or 0.0 for row in groups]
+    else:
+        sum_values = [float(row[2] or 0) for row in groups]
+    return labels, count_values, sum_values
+
+
+def _daily_aggregates(Model, domain, first_day, last_day, value_field=None, success_domain=None):
+    """Return one `(date, count, value_sum, success_count)` row per day.
+
+    Days run from `first_day` to `last_day` inclusive and are bucketed on
+    `create_date` in the context timezone, like `create_date:day` in
+    read_group. `generate_series` supplies the empty days, so the rows come
+    back complete and in order. The success count comes from the same scan
+    through `COUNT(*) FILTER (...)` instead of a second grouped query. Both
+    domains go through `_search` so record rules still apply.
+
+    `domain` is the report's own domain: the window is added to the same
+    query rather than as extra leaves, and the success subquery only compiles
+    `success_domain` since the outer query already applies `domain`.
+    """
+    query = Model._search(domain)
+    query.order = None
+    table = Model._table
+    tz = Model.env.context.get('tz')
+    if tz not in pytz.all_timezones_set:
+        tz = 'UTC'
+    create_date = Model._field_to_sql(table, 'create_date', query)
+    # local midnights converted to UTC, so the bounds match the day buckets
+    # and create_date is compared as stored
+    query.add_where(SQL(
+        "%s >= timezone('UTC', timezone(%s, %s::date::timestamp)) AND %s < timezone('UTC', timezone(%s, (%s::date + 1)::timestamp))",
+        create_date, tz, first_day, create_date, tz, last_day,
+    ))
+    day = SQL("date_trunc('day', timezone(%s, timezone('UTC', %s)))", tz, create_date)
+    value = Model._field_to_sql(table, value_field, query) if value_field else SQL("0")
+    if success_domain:
+        success = SQL("%s IN %s", SQL.identifier(table, 'id'), Model._search(success_domain).subselect())
+    else:
+        success = SQL("FALSE")
+    matched = query.select(SQL("%s AS day", day), SQL("%s AS value", value), SQL("%s AS success", success))
+    Model.env.cr.execute(SQL(
+        """
+        SELECT days.day::date, COUNT(m.day), COALESCE(SUM(m.value), 0), COUNT(m.day) FILTER (WHERE m.success)
+          FROM generate_series(%s::timestamp, %s::timestamp, interval '1 day') AS days(day)
+     LEFT JOIN (%s) AS m ON m.day = days.day
+      GROUP BY days.day
+      ORDER BY days.day
+        """,
+        first_day, last_day, matched,
+    ))
+    return Model.env.cr.fetchall()
+
+
+def _related_group_aggregates(Model, domain, top, rel_field, value_field=None, limit=None):
+    """Return `[(target, count, value_sum)]` grouped on `top.rel_field`.
+
+    The comodel of the many2one `top` is LEFT JOINed so the records are
+    grouped on the related column in one query, instead of grouping on
+    `top` and resolving the target of every group afterwards. `target` is
+    the raw column value: an id for a many2one, the value itself otherwise.
+    Records without a `top` or a target (empty strings included) are
+    grouped under `None`. With `limit` only the Top-N groups by sum (or
+    count without a value field) are returned.
+    """
+    query = Model._search(domain)
+    query.order = None
+    table = Model._table
+    comodel = Model.env[Model._fields[top].comodel_name]
+    alias = query.make_alias(table, top)
+    query.add_join('LEFT JOIN', alias, comodel._table, SQL(
+        "%s = %s", Model._field_to_sql(table, top, query), SQL.identifier(alias, 'id'),
+    ))
+    target = comodel._field_to_sql(alias, rel_field, query)
+    if comodel._fields[rel_field].type in ('char', 'text'):
+        target = SQL("NULLIF(%s, '')", target)
+    value = SQL("SUM(%s)", Model._field_to_sql(table, value_field, query)) if value_field else SQL("0")
+    query.groupby = SQL("1")
+    if limit:
+        query.order = SQL("3 DESC") if value_field else SQL("2 DESC")
+        query.limit = limit
+    Model.env.cr.execute(query.select(target, SQL("COUNT(*)"), value))
+    return Model.env.cr.fetchall()
+
+
+class LookerFieldMixin(models.AbstractModel):
+    """Field metadata helpers shared by the report models.
+
+    Labels, types and relations of the source model fields are read from
+    `ir.model.fields` with a single query per model and language, then served
+    from the ORM cache instead of issuing one search per field. The mixin also
+    provides the guarded `get_chart_data` entry point around each model's
+    `_chart_data`, and the batched `create` that validates the required
+    fields and fills descriptions through each model's
+    `_ensure_auto_descriptions`.
+    """
+
+    _name = 'looker_studio.field.mixin'
+    _description = 'Looker Studio - Field metadata helpers'
+
+    @api.model
+    @tools.ormcache('model_name', 'self.env.lang')
+    def _field_labels(self, model_name):
+        """Return {field name: {field_description, ttype, relation}} for a model."""
+        rows = self.env['ir.model.fields'].sudo().search_read(
+            [('model', '=', model_name)], ['name', 'field_description', 'ttype', 'relation'])
+        return {r['name']: r for r in rows}
+
+    def _model_fields(self, model_name):
+        """Return the in-memory field definitions of a model ({} if not installed)."""
+        return self.env[model_name]._fields if model_name in self.env else {}
+
+    def _model_field_label(self, model_name, field_name):
+        """Return the human label for a field or the raw name as fallback."""
+        if not field_name:
+            return ''
+        f = self._field_labels(model_name).get(field_name)
+        return (f['field_description'] if f and f['field_description'] else field_name)
+
+    def get_chart_data(self, include_groups=True, include_timeseries=True):
+        """Aggregate data for charts.
+
+        Returns a dict with keys: labels, count_values, sum_values, line_labels, line_values.
+        Always returns lists (never None) to simplify template handling.
+        `include_groups` / `include_timeseries` skip the grouped or the
+        14-day aggregates for callers that do not display them; the matching
+        keys are then empty lists.
+
+        The queries run in a savepoint so a failing one leaves the request's
+        transaction usable. A report whose configuration makes the queries
+        fail is served the empty payload for _BROKEN_REPORT_TTL seconds, or
+        until it is edited, instead of re-running them on every view.
+        Transient database errors (serialization failures, deadlocks,
+        statement timeouts) are not configuration errors: they propagate so
+        the request can be retried.
+        """
+        self.ensure_one()
+        key = (self.env.cr.dbname, self._name, self.id, str(self.write_date), include_groups, include_timeseries)
+        now = time.monotonic()
+        with _broken_reports_lock:
+            until = _broken_reports.get(key)
+            if until is not None and until <= now:
+                del _broken_reports[key]
+                until = None
+        if until is not None:
+            return _empty_chart_data()
+        try:
+            with self.env.cr.savepoint(flush=False):
+                return self._chart_data(include_groups, include_timeseries)
+        except (psycopg2.ProgrammingError, psycopg2.DataError, ValueError, KeyError, TypeError):
+            _logger.exception('get_chart_data failed for %s %s', self._name, self.id)
+            with _broken_reports_lock:
+                _broken_reports[key] = now + _BROKEN_REPORT_TTL
+                while len(_broken_reports) > _BROKEN_REPORTS_SIZE:
+                    _broken_reports.popitem(last=False)
+            return _empty_chart_data()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Labels come from the ormcache'd field metadata (one ir.model.fields
+        # query per model and language, including relation models of dotted
+        # fields), and the whole batch is inserted at once.
+        for vals in vals_list:
+            if not vals.get('group_field') or not vals.get('value_field'):
+                raise UserError('Vui lòng chọn cả "Group By Field" và "Value Field" trước khi lưu báo cáo.')
+        vals_list = [self._ensure_auto_descriptions(vals) for vals in vals_list]
+        return super(LookerFieldMixin, self).create(vals_list)
+
 
 class LookerReport(models.Model):
     """Simple report record used by the Looker Studio module.
@@ -15,6 +287,7 @@ class LookerReport(models.Model):
     """
 
     _name = 'looker_studio.report'
+    _inherit = ['looker_studio.field.mixin']
     _description = 'Looker Studio - Report (simple)'
 
     name = fields.Char(required=True)
@@ -29,33 +302,31 @@ class LookerReport(models.Model):
     line_description = fields.Text(string='Line description', help='Short description displayed under the line chart')
     bar_description = fields.Text(string='Bar description', help='Short description displayed under the bar chart')
     success_domain = fields.Text(string='Success Domain', help='Domain (Python list) selecting records considered "success" for percentage calculation, e.g. [("stage_id","=","won")]')
+    show_probability = fields.Boolean(string='Show Probability', default=True, help='Display the average probability (Xác suất AI) per category on the preview')
 
     # --- Auto-generation helpers for description fields ---
     def _crm_field_label(self, field_name):
         """Return the human label for a CRM field or the raw name as fallback."""
-        if not field_name:
-            return ''
-        f = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead'), ('name', '=', field_name)], limit=1)
-        return (f.field_description if f and f.field_description else field_name)
+        return self._model_field_label('crm.lead', field_name)
 
     def _build_pie_description(self):
-        return ('Phân bố khách hàng tiềm năng theo %s.' % self._crm_field_label(self.group_field)) if self.group_field else 'Phân bố khách hàng tiềm năng.'
+        return (_CRM_PIE_TMPL % self._crm_field_label(self.group_field)) if self.group_field else _CRM_PIE_NONE
 
     def _build_bar_description(self):
         if self.group_field and self.value_field:
-            return 'Tổng %s theo %s.' % (self._crm_field_label(self.value_field), self._crm_field_label(self.group_field))
+            return _BAR_TMPL_GV % (self._crm_field_label(self.value_field), self._crm_field_label(self.group_field))
         if self.group_field:
-            return 'Số lượng khách hàng tiềm năng theo %s.' % (self._crm_field_label(self.group_field),)
-        return 'Giá trị theo danh mục.'
+            return _CRM_BAR_TMPL_G % (self._crm_field_label(self.group_field),)
+        return _BAR_TMPL_NONE
 
     def _build_line_description(self):
-        domain_part = ' (có áp dụng bộ lọc)' if self.domain else ''
+        domain_part = _FILTER_SUFFIX if self.domain else ''
         # If a success_domain is set, show success percentage trend
         if self.success_domain:
-            return 'Xu hướng tỷ lệ phần trăm khách hàng tiềm năng theo ngày trong 14 ngày gần nhất%s.' % domain_part
+            return _CRM_LINE_TMPL_SUCCESS % domain_part
         if self.value_field:
-            return 'Xu hướng tổng %s theo ngày trong 14 ngày gần nhất%s.' % (self._crm_field_label(self.value_field), domain_part)
-        return 'Xu hướng số lượng khách hàng tiềm năng trong 14 ngày gần nhất%s.' % domain_part
+            return _LINE_TMPL_V % (self._crm_field_label(self.value_field), domain_part)
+        return _CRM_LINE_TMPL_NOV % domain_part
 
     @api.onchange('group_field', 'value_field', 'domain')
     def _onchange_auto_descriptions(self):
@@ -68,64 +339,45 @@ class LookerReport(models.Model):
                 rec.line_description = rec._build_line_description()
 
     def _ensure_auto_descriptions(self, vals):
-        # If any description is explicitly provided, do not overwrite provided ones
-        if any(k in vals for k in ('pie_description', 'bar_description', 'line_description')):
-            # still ensure missing keys are filled below
-            pass
+        # Explicitly provided descriptions are never overwritten; nothing to do if all are given
+        needs = {k for k in _DESCRIPTION_KEYS if k not in vals}
+        if not needs:
+            return vals
 
         # Prefer explicit values from vals
         group_field = vals.get('group_field')
         value_field = vals.get('value_field')
         domain = vals.get('domain')
 
-        # If we are operating on an existing single record, use its values as fallback
-        if not group_field and len(self) == 1 and self.exists():
-            group_field = self.group_field or group_field
-        if not value_field and len(self) == 1 and self.exists():
-            value_field = self.value_field or value_field
-        if not domain and len(self) == 1 and self.exists():
-            domain = self.domain or domain
-
-        def label(field):
-            if not field:
-                return ''
-            f = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead'), ('name', '=', field)], limit=1)
-            return (f.field_description if f and f.field_description else field)
-
-        pie = ('Phân bố khách hàng tiềm năng theo %s.' % label(group_field)) if group_field else 'Phân bố khách hàng tiềm năng.'
-        if group_field and value_field:
-            bar = 'Tổng %s theo %s.' % (label(value_field), label(group_field))
-        elif group_field:
-            bar = 'Số lượng khách hàng tiềm năng theo %s.' % label(group_field)
-        else:
-            bar = 'Giá trị theo danh mục.'
-        if value_field:
-            line = 'Xu hướng tổng %s theo ngày trong 14 ngày gần nhất%s.' % (label(value_field), ' (có áp dụng bộ lọc)' if domain else '')
-        else:
-            line = 'Xu hướng số lượng khách hàng tiềm năng trong 14 ngày gần nhất%s.' % (' (có áp dụng bộ lọc)' if domain else '')
-
-        # Only set keys that are absent
-        if 'pie_description' not in vals:
-            vals['pie_description'] = pie
-        if 'bar_description' not in vals:
-            vals['bar_description'] = bar
-        if 'line_description' not in vals:
-            vals['line_description'] = line
+        # If we are operating on an existing single record, use its values as fallback.
+        # write() only runs on existing records, so no exists() query is needed and
+        # the three fields are served by one prefetched read.
+        if len(self) == 1:
+            group_field = group_field or self.group_field
+            value_field = value_field or self.value_field
+            domain = domain or self.domain
+
+        # Only look up the labels that a missing description actually needs
+        group_label = self._crm_field_label(group_field) if needs & {'pie_description', 'bar_description'} else ''
+        value_label = self._crm_field_label(value_field) if needs & {'bar_description', 'line_description'} else ''
+
+        if 'pie_description' in needs:
+            vals['pie_description'] = (_CRM_PIE_TMPL % group_label) if group_field else _CRM_PIE_NONE
+        if 'bar_description' in needs:
+            if group_field and value_field:
+                vals['bar_description'] = _BAR_TMPL_GV % (value_label, group_label)
+            elif group_field:
+                vals['bar_description'] = _CRM_BAR_TMPL_G % group_label
+            else:
+                vals['bar_description'] = _BAR_TMPL_NONE
+        if 'line_description' in needs:
+            domain_part = _FILTER_SUFFIX if domain else ''
+            if value_field:
+                vals['line_description'] = _LINE_TMPL_V % (value_label, domain_part)
+            else:
+                vals['line_description'] = _CRM_LINE_TMPL_NOV % domain_part
         return vals
 
-    @api.model
-    def create(self, vals):
-        def ensure_and_validate(v):
-            if not v.get('group_field') or not v.get('value_field'):
-                raise UserError('Vui lòng chọn cả "Group By Field" và "Value Field" trước khi lưu báo cáo.')
-            return self._ensure_auto_descriptions(v)
-
-        if isinstance(vals, list):
-            vals = [ensure_and_validate(v) for v in vals]
-            return super(LookerReport, self).create(vals)
-        vals = ensure_and_validate(vals)
-        return super(LookerReport, self).create(vals)
-
     def write(self, vals):
         # Populate missing descriptions for updates when called with a dict
         if isinstance(vals, dict):
@@ -136,7 +388,16 @@ class LookerReport(models.Model):
         if not self.domain:
             return []
         try:
-            return safe_eval(self.domain)
+            return list(_parse_domain(self.domain))
+        except Exception:
+            return []
+
+    def _eval_success_domain(self):
+        success_domain = self.success_domain
+        if not success_domain:
+            return []
+        try:
+            return list(_parse_domain(success_domain))
         except Exception:
             return []
 
@@ -144,171 +405,100 @@ class LookerReport(models.Model):
     def _get_crm_group_fields(self):
         """Return a selection of sensible group-by fields for crm.lead."""
         allowed = ['stage_id', 'user_id', 'team_id', 'partner_id', 'company_id', 'country_id']
-        res = []
-        for name in allowed:
-            f = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead'), ('name', '=', name)], limit=1)
-            if f:
-                res.append((f.name, f.field_description or f.name))
+        crm_fields = self._model_fields('crm.lead')
+        res = [(name, crm_fields[name]._description_string(self.env) or name) for name in allowed if name in crm_fields]
         if not res:
-            fields = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead')])
-            for f in fields:
-                if f.ttype in ('char', 'selection', 'many2one'):
-                    res.append((f.name, f.field_description or f.name))
+            for name, f in crm_fields.items():
+                if f.type in ('char', 'selection', 'many2one'):
+                    res.append((name, f._description_string(self.env) or name))
         return res
 
     @api.model
     def _get_crm_value_fields(self):
         """Return a selection of numeric fields usable as value metrics."""
         allowed = ['expected_revenue', 'planned_revenue', 'probability']
-        res = []
-        for name in allowed:
-            f = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead'), ('name', '=', name)], limit=1)
-            if f and f.ttype in ('integer', 'float', 'monetary'):
-                res.append((f.name, f.field_description or f.name))
+        numeric = ('integer', 'float', 'monetary')
+        crm_fields = self._model_fields('crm.lead')
+        res = [(name, crm_fields[name]._description_string(self.env) or name)
+               for name in allowed if name in crm_fields and crm_fields[name].type in numeric]
         if not res:
-            fields = self.env['ir.model.fields'].sudo().search([('model', '=', 'crm.lead')])
-            for f in fields:
-                if f.ttype in ('integer', 'float', 'monetary'):
-                    res.append((f.name, f.field_description or f.name))
+            for name, f in crm_fields.items():
+                if f.type in numeric:
+                    res.append((name, f._description_string(self.env) or name))
         return res
 
-    def get_chart_data(self):
-        """Aggregate data for charts.
-
-        Returns a dict with keys: labels, count_values, sum_values, line_labels, line_values.
-        Always returns lists (never None) to simplify template handling.
-        """
-        self.ensure_one()
+    def _chart_data(self, include_groups, include_timeseries):
+        """Chart payload of the CRM report; see get_chart_data()."""
         Model = self.env['crm.lead']
         domain = self._eval_domain()
+        # bind the record fields once; each access goes through the field descriptor
+        group_field = self.group_field
+        raw_value = self.value_field
+        raw_limit = self.limit or 0
+        value_field = raw_value if raw_value in Model._fields else False
+        limit_n = raw_limit if raw_limit > 0 else 0
 
         labels = []
         count_values = []
         sum_values = []
 
-        try:
-            if self.group_field:
-                try:
-                    groups = Model.read_group(domain, [self.group_field], [self.group_field], lazy=False)
-                except Exception:
-                    _logger.exception('read_group(groups) failed for report %s', self.id)
-                    groups = []
-
-                sum_map = {}
-                if self.value_field:
-                    try:
-                        grp_sum = Model.read_group(domain, [self.group_field, self.value_field], [self.group_field], lazy=False)
-                    except Exception:
-                        _logger.exception('read_group(sum) failed for report %s', self.id)
-                        grp_sum = []
-                    for g in grp_sum:
-                        key = g.get(self.group_field)
-                        gid = key[0] if isinstance(key, (list, tuple)) else key
-                        sum_map[gid] = g.get(self.value_field) or 0.0
-
-                group_entries = []
-                for g in groups:
-                    key = g.get(self.group_field)
-                    gid = key[0] if isinstance(key, (list, tuple)) else key
-                    lbl = key[1] if isinstance(key, (list, tuple)) and len(key) > 1 else (key or 'Undefined')
-                    cnt = g.get('__count', 0)
-                    sval = sum_map.get(gid, cnt if not self.value_field else 0.0)
-                    group_entries.append({'gid': gid, 'label': str(lbl), 'count': cnt, 'sum': float(sval)})
-
-                limit_n = int(self.limit) if getattr(self, 'limit', 0) and int(self.limit) > 0 else 0
-                if limit_n and len(group_entries) > limit_n:
-                    sort_key = 'sum' if self.value_field else 'count'
-                    group_entries = sorted(group_entries, key=lambda x: x[sort_key], reverse=True)[:limit_n]
+        if include_groups:
+            if group_field:
+                # one grouped query returns both __count and the value_field sum;
+                # the Top-N limit is applied by PostgreSQL only when there are more groups
+                aggregates = ['__count'] + (['%s:sum' % value_field] if value_field else [])
+                groups = _read_top_groups(Model, domain, group_field, aggregates, value_field, limit_n)
 
-                for entry in group_entries:
-                    labels.append(entry['label'])
-                    count_values.append(entry['count'])
-                    sum_values.append(entry['sum'])
+                labels, count_values, sum_values = _group_columns(self.env, groups, value_field and Model._fields[value_field])
             else:
-                total = Model.search_count(domain)
+                # an ungrouped _read_group returns a single (count, sum) row
+                [(total, *sums)] = Model._read_group(domain, [], ['__count'] + (['%s:sum' % value_field] if value_field else []))
                 labels = ['All']
                 count_values = [total]
-                if self.value_field:
-                    rows = Model.read_group(domain, [self.value_field], [], lazy=False)
-                    total_sum = rows[0].get(self.value_field) if rows else 0.0
-                    sum_values = [total_sum or 0.0]
-                else:
-                    sum_values = [total]
+                sum_values = [(sums[0] or 0.0) if value_field else total]
 
+        line_labels = []
+        line_values = []
+        if include_timeseries:
             # Time-series (last N days)
-            from datetime import datetime, timedelta
             today = fields.Date.context_today(self)
-            if isinstance(today, str):
-                today_dt = datetime.strptime(today, '%Y-%m-%d')
-            else:
-                today_dt = datetime.combine(today, datetime.min.time())
-
             N = 14
-            start_dt = (today_dt - timedelta(days=N - 1)).strftime('%Y-%m-%d 00:00:00')
-            end_dt = (today_dt + timedelta(days=1)).strftime('%Y-%m-%d 00:00:00')
-            ts_domain = list(domain) + [('create_date', '>=', start_dt), ('create_date', '<', end_dt)]
+            # day buckets are keyed by date objects; labels are formatted once from them
+            days = [today - timedelta(days=N - 1 - i) for i in range(N)]
+            line_labels = [d.isoformat() for d in days]
 
-            try:
-                if self.value_field:
-                    ts_groups = Model.read_group(ts_domain, ['create_date', self.value_field], ['create_date:day'], lazy=False)
-                else:
-                    ts_groups = Model.read_group(ts_domain, ['create_date'], ['create_date:day'], lazy=False)
-            except Exception:
-                _logger.exception('read_group(time-series) failed for report %s', self.id)
-                ts_groups = []
-
-            ts_map = {}
-            ts_success_map = {}
-            success_dom = []
-            if self.success_domain:
+            success_dom = self._eval_success_domain()
+            success_query_dom = success_dom
+            if success_dom:
                 try:
-                    success_dom = safe_eval(self.success_domain) or []
-                except Exception:
-                    success_dom = []
-
-            for g in ts_groups:
-                key = g.get('create_date')
-                day = key[0] if isinstance(key, (list, tuple)) else key
-                if self.value_field:
-                    ts_map[str(day)] = g.get(self.value_field) or 0.0
-                else:
-                    ts_map[str(day)] = g.get('__count', 0)
+                    # compiled up front so an invalid success domain only zeroes
+                    # the success series instead of failing the whole chart
+                    Model._search(success_dom)
+                except (ValueError, TypeError):
+                    _logger.warning('Invalid success domain on report %s', self.id)
+                    success_query_dom = None
+
+            # one row per day, totals and success count from a single scan
+            ts_rows = _daily_aggregates(Model, domain, days[0], days[-1], value_field, success_query_dom)
 
             if success_dom:
-                try:
-                    ts_groups_success = Model.read_group(list(ts_domain) + list(success_dom), ['create_date'], ['create_date:day'], lazy=False)
-                except Exception:
-                    _logger.exception('read_group(time-series-success) failed for report %s', self.id)
-                    ts_groups_success = []
-                for g in ts_groups_success:
-                    key = g.get('create_date')
-                    day = key[0] if isinstance(key, (list, tuple)) else key
-                    ts_success_map[str(day)] = g.get('__count', 0)
-
-            line_labels = []
-            line_values = []
-            for i in range(N):
-                day_dt = (today_dt - timedelta(days=N - 1 - i))
-                day_str = day_dt.strftime('%Y-%m-%d')
-                line_labels.append(day_str)
-                if success_dom:
-                    total = ts_map.get(day_str, 0)
-                    succ = ts_success_map.get(day_str, 0)
-                    perc = (float(succ) / float(total) * 100.0) if total else 0.0
-                    line_values.append(round(perc, 1))
-                else:
-                    line_values.append(ts_map.get(day_str, 0 if not self.value_field else 0.0))
-
-            return {
-                'labels': labels,
-                'count_values': count_values,
-                'sum_values': sum_values,
-                'line_labels': line_labels,
-                'line_values': line_values,
-            }
-        except Exception:
-            _logger.exception('Unexpected error in get_chart_data for report %s', getattr(self, 'id', '?'))
-            return {'labels': [], 'count_values': [], 'sum_values': [], 'line_labels': [], 'line_values': []}
+                # percentage of leads, so divide by the daily count rather than the value sum
+                line_values = [
+                    round(float(succ) / float(count) * 100.0, 1) if count else 0.0
+                    for _day, count, _value_sum, succ in ts_rows
+                ]
+            elif value_field:
+                line_values = [value_sum for _day, _count, value_sum, _succ in ts_rows]
+            else:
+                line_values = [count for _day, count, _value_sum, _succ in ts_rows]
+
+        return {
+            'labels': labels,
+            'count_values': count_values,
+            'sum_values': sum_values,
+            'line_labels': line_labels,
+            'line_values': line_values,
+        }
 
     def action_preview(self):
         self.ensure_one()
@@ -328,6 +518,7 @@ class LookerOrderReport(models.Model):
     """
 
     _name = 'looker_studio.order_report'
+    _inherit = ['looker_studio.field.mixin']
     _description = 'Looker Studio - Order Report (sale.order)'
 
     name = fields.Char(required=True)
@@ -351,21 +542,19 @@ class LookerOrderReport(models.Model):
             top = parts[0]
             sub = parts[1] if len(parts) > 1 else None
             # Try to resolve top field description
-            f_top = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order'), ('name', '=', top)], limit=1)
-            top_label = f_top.field_description if f_top and f_top.field_description else top
-            if sub and f_top and f_top.ttype == 'many2one' and f_top.relation:
-                f_sub = self.env['ir.model.fields'].sudo().search([('model', '=', f_top.relation), ('name', '=', sub)], limit=1)
-                sub_label = f_sub.field_description if f_sub and f_sub.field_description else sub
+            f_top = self._field_labels('sale.order').get(top)
+            top_label = f_top['field_description'] if f_top and f_top['field_description'] else top
+            if sub and f_top and f_top['ttype'] == 'many2one' and f_top['relation']:
+                sub_label = self._model_field_label(f_top['relation'], sub)
                 # Return e.g. "Quốc gia (Đối tác)"
                 return '%s (%s)' % (sub_label, top_label)
             # Fallback: return the dotted name but replace '_' with ' '
             return field_name.replace('_', ' ')
         # Non-dotted field: look up directly on sale.order
-        f = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order'), ('name', '=', field_name)], limit=1)
-        return (f.field_description if f and f.field_description else (field_name or ''))
+        return self._model_field_label('sale.order', field_name)
 
     def _build_pie_description(self):
-        return ('Phân bố đơn hàng theo %s.' % self._order_field_label(self.group_field)) if self.group_field else 'Phân bố đơn hàng.'
+        return (_ORDER_PIE_TMPL % self._order_field_label(self.group_field)) if self.group_field else _ORDER_PIE_NONE
 
     def _build_bar_description(self):
         if self.group_field and self.value_field:
@@ -376,13 +565,13 @@ class LookerOrderReport(models.Model):
                 sval = 'giá trị'
             elif sval.lower().startswith('tổng '):
                 sval = sval[5:].strip()
-            return 'Tổng %s theo %s.' % (sval, self._order_field_label(self.group_field))
+            return _BAR_TMPL_GV % (sval, self._order_field_label(self.group_field))
         if self.group_field:
-            return 'Số lượng đơn hàng theo %s.' % (self._order_field_label(self.group_field),)
-        return 'Giá trị theo danh mục.'
+            return _ORDER_BAR_TMPL_G % (self._order_field_label(self.group_field),)
+        return _BAR_TMPL_NONE
 
     def _build_line_description(self):
-        domain_part = ' (có áp dụng bộ lọc)' if self.domain else ''
+        domain_part = _FILTER_SUFFIX if self.domain else ''
         if self.value_field:
             val_label = self._order_field_label(self.value_field)
             sval = val_label.strip()
@@ -390,8 +579,8 @@ class LookerOrderReport(models.Model):
                 sval = 'giá trị'
             elif sval.lower().startswith('tổng '):
                 sval = sval[5:].strip()
-            return 'Xu hướng tổng %s theo ngày trong 14 ngày gần nhất%s.' % (sval, domain_part)
-        return 'Xu hướng số lượng đơn hàng trong 14 ngày gần nhất%s.' % domain_part
+            return _LINE_TMPL_V % (sval, domain_part)
+        return _ORDER_LINE_TMPL_NOV % domain_part
 
     @api.onchange('group_field', 'value_field', 'domain')
     def _onchange_auto_descriptions(self):
@@ -405,49 +594,40 @@ class LookerOrderReport(models.Model):
 
     def _ensure_auto_descriptions(self, vals):
         # Similar behavior to LookerReport: populate missing description keys
+        needs = {k for k in _DESCRIPTION_KEYS if k not in vals}
+        if not needs:
+            return vals
+
         group_field = vals.get('group_field')
         value_field = vals.get('value_field')
         domain = vals.get('domain')
 
-        if not group_field and len(self) == 1 and self.exists():
-            group_field = self.group_field or group_field
-        if not value_field and len(self) == 1 and self.exists():
-            value_field = self.value_field or value_field
-        if not domain and len(self) == 1 and self.exists():
-            domain = self.domain or domain
-
-        pie = ('Phân bố đơn hàng theo %s.' % self._order_field_label(group_field)) if group_field else 'Phân bố đơn hàng.'
-        if group_field and value_field:
-            bar = 'Tổng %s theo %s.' % (self._order_field_label(value_field), self._order_field_label(group_field))
-        elif group_field:
-            bar = 'Số lượng đơn hàng theo %s.' % self._order_field_label(group_field)
-        else:
-            bar = 'Giá trị theo danh mục.'
-        if value_field:
-            line = 'Xu hướng tổng %s theo ngày trong 14 ngày gần nhất%s.' % (self._order_field_label(value_field), ' (có áp dụng bộ lọc)' if domain else '')
-        else:
-            line = 'Xu hướng số lượng đơn hàng trong 14 ngày gần nhất%s.' % (' (có áp dụng bộ lọc)' if domain else '')
-
-        if 'pie_description' not in vals:
-            vals['pie_description'] = pie
-        if 'bar_description' not in vals:
-            vals['bar_description'] = bar
-        if 'line_description' not in vals:
-            vals['line_description'] = line
+        if len(self) == 1:
+            group_field = group_field or self.group_field
+            value_field = value_field or self.value_field
+            domain = domain or self.domain
+
+        # Only look up the labels that a missing description actually needs
+        group_label = self._order_field_label(group_field) if needs & {'pie_description', 'bar_description'} else ''
+        value_label = self._order_field_label(value_field) if needs & {'bar_description', 'line_description'} else ''
+
+        if 'pie_description' in needs:
+            vals['pie_description'] = (_ORDER_PIE_TMPL % group_label) if group_field else _ORDER_PIE_NONE
+        if 'bar_description' in needs:
+            if group_field and value_field:
+                vals['bar_description'] = _BAR_TMPL_GV % (value_label, group_label)
+            elif group_field:
+                vals['bar_description'] = _ORDER_BAR_TMPL_G % group_label
+            else:
+                vals['bar_description'] = _BAR_TMPL_NONE
+        if 'line_description' in needs:
+            domain_part = _FILTER_SUFFIX if domain else ''
+            if value_field:
+                vals['line_description'] = _LINE_TMPL_V % (value_label, domain_part)
+            else:
+                vals['line_description'] = _ORDER_LINE_TMPL_NOV % domain_part
         return vals
 
-    def create(self, vals):
-        def ensure_and_validate(v):
-            if not v.get('group_field') or not v.get('value_field'):
-                raise UserError('Vui lòng chọn cả "Group By Field" và "Value Field" trước khi lưu báo cáo.')
-            return self._ensure_auto_descriptions(v)
-
-        if isinstance(vals, list):
-            vals = [ensure_and_validate(v) for v in vals]
-            return super(LookerOrderReport, self).create(vals)
-        vals = ensure_and_validate(vals)
-        return super(LookerOrderReport, self).create(vals)
-
     def write(self, vals):
         if isinstance(vals, dict):
             vals = self._ensure_auto_descriptions(vals)
@@ -457,13 +637,14 @@ class LookerOrderReport(models.Model):
     def _get_order_group_fields(self):
         # prefer partner.city for province/municipality grouping (customer 'city' field)
         allowed = ['partner_id', 'partner_id.country_id', 'partner_id.city', 'user_id', 'date_order', 'date_order_weekday']
+        order_fields = self._model_fields('sale.order')
         res = []
         for name in allowed:
             # Try to find a field when it's a direct field on sale.order
             if '.' not in name:
-                f = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order'), ('name', '=', name)], limit=1)
+                f = order_fields.get(name)
                 if f:
-                    res.append((f.name, f.field_description or f.name))
+                    res.append((name, f._description_string(self.env) or name))
                 else:
                     # For computed helpers like date_order_weekday add a friendly label
                     if name == 'date_order_weekday':
@@ -476,237 +657,197 @@ class LookerOrderReport(models.Model):
                     res.append((name, 'Tỉnh/Thành (Đối tác)'))
         # Fallback: scan sale.order fields for common types
         if not res:
-            fields = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order')])
-            for f in fields:
-                if f.ttype in ('char', 'selection', 'many2one'):
-                    res.append((f.name, f.field_description or f.name))
+            for name, f in order_fields.items():
+                if f.type in ('char', 'selection', 'many2one'):
+                    res.append((name, f._description_string(self.env) or name))
         return res
 
     @api.model
     def _get_order_value_fields(self):
         # Prefer common sale.order monetary fields present on most databases
         allowed = ['amount_total', 'amount_untaxed', 'amount_tax']
-        res = []
-        for name in allowed:
-            f = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order'), ('name', '=', name)], limit=1)
-            if f and f.ttype in ('integer', 'float', 'monetary'):
-                res.append((f.name, f.field_description or f.name))
+        numeric = ('integer', 'float', 'monetary')
+        order_fields = self._model_fields('sale.order')
+        res = [(name, order_fields[name]._description_string(self.env) or name)
+               for name in allowed if name in order_fields and order_fields[name].type in numeric]
         if not res:
-            fields = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order')])
-            for f in fields:
-                if f.ttype in ('integer', 'float', 'monetary'):
-                    res.append((f.name, f.field_description or f.name))
+            for name, f in order_fields.items():
+                if f.type in numeric:
+                    res.append((name, f._description_string(self.env) or name))
         return res
 
     def _eval_domain(self):
         if not self.domain:
             return []
         try:
-            return safe_eval(self.domain)
+            return list(_parse_domain(self.domain))
         except Exception:
             return []
 
-    def get_chart_data(self):
-        self.ensure_one()
+    def _chart_data(self, include_groups, include_timeseries):
+        """Chart payload of the order report; see get_chart_data()."""
         Model = self.env['sale.order']
         domain = self._eval_domain()
+        # bind the record fields once; each access goes through the field descriptor
+        group_field = self.group_field
+        raw_value = self.value_field
+        raw_limit = self.limit or 0
+        value_field = raw_value if raw_value in Model._fields else False
+        limit_n = raw_limit if raw_limit > 0 else 0
 
         labels = []
         count_values = []
         sum_values = []
 
-        try:
+        if include_groups:
             # Special support: group by weekday
-            if self.group_field == 'date_order_weekday':
-                # build weekday buckets Mon..Sun
-                from datetime import datetime
-                weekday_map = {i: 0 for i in range(7)}
-                sum_map = {i: 0.0 for i in range(7)}
-                rows = Model.search(domain)
-                for r in rows:
-                    dt = r.date_order
-                    if not dt:
+            if group_field == 'date_order_weekday':
+                # aggregate per day in SQL, then fold the day buckets into Mon..Sun
+                weekday_map = [0] * 7
+                sum_map = [0.0] * 7
+                aggregates = ['__count'] + (['%s:sum' % value_field] if value_field else [])
+                for row in Model._read_group(domain, ['date_order:day'], aggregates):
+                    day = row[0]
+                    if not day:
                         continue
-                    if isinstance(dt, str):
-                        try:
-                            dt_obj = datetime.strptime(dt, '%Y-%m-%d %H:%M:%S')
-                        except Exception:
-                            continue
-                    else:
-                        dt_obj = dt
-                    wd = dt_obj.weekday()
-                    weekday_map[wd] += 1
-                    if self.value_field:
-                        sum_map[wd] += float(getattr(r, self.value_field) or 0.0)
-                days = ['Thứ 2','Thứ 3','Thứ 4','Thứ 5','Thứ 6','Thứ 7','Chủ Nhật']
+                    wd = day.weekday()
+                    weekday_map[wd] += row[1]
+                    if value_field:
+                        sum_map[wd] += float(row[2] or 0.0)
                 for i in range(7):
-                    labels.append(days[i])
-                    count_values.append(weekday_map.get(i, 0))
-                    sum_values.append(round(sum_map.get(i, 0.0), 2))
-            elif self.group_field and '.' in str(self.group_field):
+                    labels.append(_WEEKDAY_LABELS_VI[i])
+                    count_values.append(weekday_map[i])
+                    sum_values.append(round(sum_map[i], 2))
+            elif group_field and '.' in str(group_field):
                 # relational subgroup like partner_id.state_id or partner_id.country_id
-                parts = str(self.group_field).split('.')
+                parts = str(group_field).split('.')
                 top = parts[0]
                 rel_field = parts[1] if len(parts) > 1 else None
-                try:
-                    groups = Model.read_group(domain, [top], [top], lazy=False)
-                except Exception:
-                    groups = []
-
-                # optional per-top sums when value_field is provided
-                sum_map_per_top = {}
-                if self.value_field:
-                    try:
-                        grp_sum = Model.read_group(domain, [top, self.value_field], [top], lazy=False)
-                    except Exception:
-                        grp_sum = []
-                    for g in grp_sum:
-                        key = g.get(top)
-                        tg = key[0] if isinstance(key, (list, tuple)) else key
-                        sum_map_per_top[tg] = g.get(self.value_field) or 0.0
-
                 # determine relation model for the top field (most often many2one)
                 rel_model = None
-                try:
-                    f_top = self.env['ir.model.fields'].sudo().search([('model', '=', 'sale.order'), ('name', '=', top)], limit=1)
-                    if f_top and f_top.ttype == 'many2one':
-                        rel_model = f_top.relation
-                except Exception:
-                    rel_model = None
-
-                buckets = {}
-                for g in groups:
-                    key = g.get(top)
-                    gid = key[0] if isinstance(key, (list, tuple)) else key
-                    cnt = g.get('__count', 0)
-                    # find related target (e.g., partner.country_id)
-                    if not gid:
-                        rel_id = None
-                        rel_label = 'Undefined'
-                        rel_sum = 0.0
+                f_top = self._field_labels('sale.order').get(top)
+                if f_top and f_top['ttype'] == 'many2one':
+                    rel_model = f_top['relation']
+
+                rel_target = self.env[rel_model]._fields.get(rel_field) if rel_model and rel_field else None
+
+                if rel_target and rel_target.store and rel_target.column_type and not rel_target.translate:
+                    # group on the related column directly with a join, one query in total
+                    rows = _related_group_aggregates(Model, domain, top, rel_field, value_field, limit_n)
+                    if rel_target.type == 'many2one':
+                        targets = self.env[rel_target.comodel_name].sudo().browse([r[0] for r in rows if r[0]])
+                        names = {t.id: sys.intern(t.display_name) for t in targets if t.display_name}
                     else:
-                        rel_sum = sum_map_per_top.get(gid, 0.0)
-                        if rel_model:
-                            try:
-                                rel_rec = self.env[rel_model].sudo().browse(gid)
-                                target = getattr(rel_rec, rel_field, None)
-                                if target:
-                                    rel_id = target.id if hasattr(target, 'id') else target
-                                    rel_label = (target.name if hasattr(target, 'name') else str(target)) or 'Undefined'
+                        # scalar subfields such as partner_id.city are their own label
+                        names = {r[0]: sys.intern(r[0] if type(r[0]) is str else str(r[0])) for r in rows if r[0]}
+                    # entries are [label, count, sum] lists
+                    group_entries = [
+                        [names.get(rel_id) or 'Undefined', cnt, float(rel_sum or 0.0) if value_field else 0.0]
+                        for rel_id, cnt, rel_sum in rows
+                    ]
+                else:
+                    # one grouped query returns both __count and the per-top value_field sum
+                    groups = Model.read_group(domain, [top, value_field] if value_field else [top], [top], lazy=False)
+
+                    # resolve the related target of every top record with one batched read
+                    top_to_target = {}
+                    if rel_model:
+                        top_ids = []
+                        for g in groups:
+                            key = g.get(top)
+                            gid = key[0] if isinstance(key, (list, tuple)) else key
+                            if gid:
+                                top_ids.append(gid)
+                        for r in self.env[rel_model].sudo().browse(top_ids).read([rel_field]):
+                            top_to_target[r['id']] = r[rel_field]
+
+                    buckets = {}
+                    for g in groups:
+                        key = g.get(top)
+                        gid = key[0] if isinstance(key, (list, tuple)) else key
+                        cnt = g.get('__count', 0)
+                        # find related target (e.g., partner.country_id)
+                        if not gid:
+                            rel_id = None
+                            rel_label = 'Undefined'
+                            rel_sum = 0.0
+                        else:
+                            rel_sum = (g.get(value_field) or 0.0) if value_field else 0.0
+                            if rel_model:
+                                # many2one targets are read as (id, display_name), scalar ones as-is
+                                target = top_to_target.get(gid)
+                                if isinstance(target, (list, tuple)):
+                                    rel_id = target[0]
+                                    rel_label = target[1] or 'Undefined'
+                                elif target:
+                                    rel_id = target
+                                    rel_label = str(target)
                                 else:
                                     rel_id = None
                                     rel_label = 'Undefined'
-                            except Exception:
-                                rel_id = None
-                                rel_label = 'Undefined'
+                            else:
+                                # fallback: cannot resolve relation model, use top label
+                                rel_id = gid
+                                rel_label = (key[1] if isinstance(key, (list, tuple)) and len(key) > 1 else (key or 'Undefined'))
+
+                        # one [label, count, sum] list per target, merged in place
+                        bucket = buckets.get(rel_id)
+                        if bucket is None:
+                            buckets[rel_id] = [sys.intern(rel_label if type(rel_label) is str else str(rel_label)), int(cnt or 0), float(rel_sum or 0.0)]
                         else:
-                            # fallback: cannot resolve relation model, use top label
-                            rel_id = gid
-                            rel_label = (key[1] if isinstance(key, (list, tuple)) and len(key) > 1 else (key or 'Undefined'))
-
-                    if rel_id not in buckets:
-                        buckets[rel_id] = {'gid': rel_id, 'label': str(rel_label), 'count': 0, 'sum': 0.0}
-                    buckets[rel_id]['count'] += int(cnt or 0)
-                    buckets[rel_id]['sum'] += float(rel_sum or 0.0)
-
-                # convert buckets to entries
-                group_entries = []
-                for b in buckets.values():
-                    group_entries.append({'gid': b['gid'], 'label': b['label'], 'count': b['count'], 'sum': float(b['sum'])})
-
-                # Apply Top-N limit if requested (same logic as other branch)
-                limit_n = int(self.limit) if getattr(self, 'limit', 0) and int(self.limit) > 0 else 0
+                            bucket[1] += int(cnt or 0)
+                            bucket[2] += float(rel_sum or 0.0)
+                    group_entries = list(buckets.values())
+
+                # Apply Top-N limit if requested; the joined query already did it in SQL,
+                # merged buckets keep only the N largest without sorting them all
                 if limit_n and len(group_entries) > limit_n:
-                    sort_key = 'sum' if self.value_field else 'count'
-                    group_entries = sorted(group_entries, key=lambda x: x[sort_key], reverse=True)[:limit_n]
-
-                # Populate output arrays from entries
-                for entry in group_entries:
-                    labels.append(entry['label'])
-                    count_values.append(entry['count'])
-                    sum_values.append(entry['sum'])
-            elif self.group_field:
-                try:
-                    groups = Model.read_group(domain, [self.group_field], [self.group_field], lazy=False)
-                except Exception:
-                    groups = []
-                # If a value_field is requested, compute per-group sums using read_group
-                sum_map = {}
-                if self.value_field:
-                    try:
-                        grp_sum = Model.read_group(domain, [self.group_field, self.value_field], [self.group_field], lazy=False)
-                    except Exception:
-                        grp_sum = []
-                    for gs in grp_sum:
-                        key = gs.get(self.group_field)
-                        gid = key[0] if isinstance(key, (list, tuple)) else key
-                        sum_map[gid] = gs.get(self.value_field) or 0.0
-
-                for g in groups:
-                    key = g.get(self.group_field)
-                    gid = key[0] if isinstance(key, (list, tuple)) else key
-                    lbl = key[1] if isinstance(key, (list, tuple)) and len(key) > 1 else (key or 'Undefined')
-                    cnt = g.get('__count', 0)
-                    sval = sum_map.get(gid, cnt if not self.value_field else 0.0)
-                    labels.append(str(lbl))
-                    count_values.append(cnt)
-                    sum_values.append(float(sval or 0.0))
+                    group_entries = heapq.nlargest(limit_n, group_entries, key=itemgetter(2 if value_field else 1))
+
+                labels = [entry[0] for entry in group_entries]
+                count_values = [entry[1] for entry in group_entries]
+                sum_values = [entry[2] for entry in group_entries]
+            elif group_field:
+                # one grouped query returns both __count and the value_field sum
+                aggregates = ['__count'] + (['%s:sum' % value_field] if value_field else [])
+                groupby = group_field
+                if group_field in Model._fields and Model._fields[group_field].type in ('date', 'datetime'):
+                    # _read_group needs an explicit granularity; read_group defaulted to month
+                    groupby = '%s:month' % group_field
+                # Top-N is applied by PostgreSQL only when there are more groups
+                groups = _read_top_groups(Model, domain, groupby, aggregates, value_field, limit_n)
+
+                labels, count_values, sum_values = _group_columns(self.env, groups, value_field and Model._fields[value_field])
             else:
-                total = Model.search_count(domain)
+                # an ungrouped _read_group returns a single (count, sum) row
+                [(total, *sums)] = Model._read_group(domain, [], ['__count'] + (['%s:sum' % value_field] if value_field else []))
                 labels = ['All']
                 count_values = [total]
-                if self.value_field:
-                    rows = Model.read_group(domain, [self.value_field], [], lazy=False)
-                    total_sum = rows[0].get(self.value_field) if rows else 0.0
-                    sum_values = [total_sum or 0.0]
-                else:
-                    sum_values = [total]
+                sum_values = [(sums[0] or 0.0) if value_field else total]
 
+        line_labels = []
+        line_values = []
+        if include_timeseries:
             # Basic time-series: last 14 days by create_date
-            from datetime import datetime, timedelta
             today = fields.Date.context_today(self)
-            if isinstance(today, str):
-                today_dt = datetime.strptime(today, '%Y-%m-%d')
-            else:
-                today_dt = datetime.combine(today, datetime.min.time())
             N = 14
-            start_dt = (today_dt - timedelta(days=N - 1)).strftime('%Y-%m-%d 00:00:00')
-            end_dt = (today_dt + timedelta(days=1)).strftime('%Y-%m-%d 00:00:00')
-            ts_domain = list(domain) + [('create_date', '>=', start_dt), ('create_date', '<', end_dt)]
-            try:
-                if self.value_field:
-                    ts_groups = Model.read_group(ts_domain, ['create_date', self.value_field], ['create_date:day'], lazy=False)
-                else:
-                    ts_groups = Model.read_group(ts_domain, ['create_date'], ['create_date:day'], lazy=False)
-            except Exception:
-                ts_groups = []
-            ts_map = {}
-            for g in ts_groups:
-                key = g.get('create_date')
-                day = key[0] if isinstance(key, (list, tuple)) else key
-                if self.value_field:
-                    ts_map[str(day)] = g.get(self.value_field) or 0.0
-                else:
-                    ts_map[str(day)] = g.get('__count', 0)
-
-            line_labels = []
-            line_values = []
-            for i in range(N):
-                day_dt = (today_dt - timedelta(days=N - 1 - i))
-                day_str = day_dt.strftime('%Y-%m-%d')
-                line_labels.append(day_str)
-                line_values.append(ts_map.get(day_str, 0 if not self.value_field else 0.0))
-
-            return {
-                'labels': labels,
-                'count_values': count_values,
-                'sum_values': sum_values,
-                'line_labels': line_labels,
-                'line_values': line_values,
-            }
-        except Exception:
-            _logger.exception('Unexpected error in get_chart_data for order report %s', getattr(self, 'id', '?'))
-            return {'labels': [], 'count_values': [], 'sum_values': [], 'line_labels': [], 'line_values': []}
+            # day buckets are keyed by date objects; labels are formatted once from them
+            days = [today - timedelta(days=N - 1 - i) for i in range(N)]
+            line_labels = [d.isoformat() for d in days]
+            # one row per day, empty days included, from a single query
+            ts_rows = _daily_aggregates(Model, domain, days[0], days[-1], value_field)
+            if value_field:
+                line_values = [value_sum for _day, _count, value_sum, _succ in ts_rows]
+            else:
+                line_values = [count for _day, count, _value_sum, _succ in ts_rows]
+
+        return {
+            'labels': labels,
+            'count_values': count_values,
+            'sum_values': sum_values,
+            'line_labels': line_labels,
+            'line_values': line_values,
+        }
 
     def action_preview(self):
         self.ensure_one()
@@ -0,0 +1,111 @@
+from datetime import datetime, time, timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.looker_studio.models.report import _daily_aggregates, _related_group_aggregates
+
+
+@tagged('post_install', '-at_install')
+class TestChartHelpers(TransactionCase):
+    """Check the SQL chart helpers against the ORM results they replace."""
+
+    def _require(self, model_name):
+        if model_name not in self.env:
+            self.skipTest('%s is not installed' % model_name)
+
+    def _set_create_date(self, records, day):
+        self.env.cr.execute(
+            'UPDATE %s SET create_date = %%s WHERE id IN %%s' % records._table,
+            (datetime.combine(day, time(12, 0)), tuple(records.ids)),
+        )
+        records.invalidate_recordset(['create_date'])
+
+    def test_daily_aggregates_dense_days(self):
+        self._require('crm.lead')
+        Lead = self.env['crm.lead'].with_context(tz='UTC')
+        today = fields.Date.today()
+        first_day = today - timedelta(days=13)
+
+        won_first = Lead.create({'name': 'Won first', 'expected_revenue': 100})
+        lost_first = Lead.create({'name': 'Lost first', 'expected_revenue': 50})
+        won_last = Lead.create({'name': 'Won last', 'expected_revenue': 25})
+        outside = Lead.create({'name': 'Won outside', 'expected_revenue': 10})
+        self._set_create_date(won_first | lost_first, first_day)
+        self._set_create_date(won_last, today)
+        self._set_create_date(outside, first_day - timedelta(days=1))
+
+        leads = won_first | lost_first | won_last | outside
+        rows = _daily_aggregates(
+            Lead, [('id', 'in', leads.ids)], first_day, today,
+            'expected_revenue', [('name', '=like', 'Won%')],
+        )
+
+        self.assertEqual(len(rows), 14)
+        self.assertEqual([r[0] for r in rows], [first_day + timedelta(days=i) for i in range(14)])
+        by_day = {r[0]: r[1:] for r in rows}
+        self.assertEqual(by_day[first_day][0], 2)
+        self.assertAlmostEqual(float(by_day[first_day][1]), 150.0)
+        self.assertEqual(by_day[first_day][2], 1)
+        self.assertEqual(by_day[today][0], 1)
+        self.assertAlmostEqual(float(by_day[today][1]), 25.0)
+        self.assertEqual(by_day[today][2], 1)
+        for day in (first_day + timedelta(days=i) for i in range(1, 13)):
+            self.assertEqual(by_day[day][0], 0)
+            self.assertEqual(by_day[day][2], 0)
+
+        # without a success domain every success count is zero
+        rows = _daily_aggregates(Lead, [('id', 'in', leads.ids)], first_day, today)
+        self.assertEqual([r[1] for r in rows], [2] + [0] * 12 + [1])
+        self.assertFalse(any(r[3] for r in rows))
+
+    def _read_and_merge(self, Order, domain, rel_field):
+        """Group orders on `partner_id` and merge the groups per partner target."""
+        buckets = {}
+        groups = Order.read_group(domain, ['partner_id', 'amount_total'], ['partner_id'], lazy=False)
+        partners = self.env['res.partner'].browse([g['partner_id'][0] for g in groups if g['partner_id']])
+        targets = {r['id']: r[rel_field] for r in partners.read([rel_field])}
+        for g in groups:
+            target = targets.get(g['partner_id'][0]) if g['partner_id'] else None
+            if isinstance(target, (list, tuple)):
+                target = target[0]
+            key = target or None
+            cnt, total = buckets.get(key, (0, 0.0))
+            buckets[key] = (cnt + g['__count'], total + (g['amount_total'] or 0.0))
+        return buckets
+
+    def test_related_group_aggregates_matches_merge(self):
+        self._require('sale.order')
+        Partner = self.env['res.partner']
+        Order = self.env['sale.order']
+        belgium = self.env.ref('base.be')
+        france = self.env.ref('base.fr')
+        partners = Partner.create([
+            {'name': 'Brussels A', 'country_id': belgium.id, 'city': 'Brussels'},
+            {'name': 'Brussels B', 'country_id': belgium.id, 'city': 'Brussels'},
+            {'name': 'Paris', 'country_id': france.id, 'city': 'Paris'},
+            {'name': 'Nowhere', 'city': ''},
+        ])
+        product = self.env['product.product'].create({'name': 'Chart product', 'list_price': 10.0})
+        orders = Order.create([
+            {
+                'partner_id': partner.id,
+                'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': qty, 'price_unit': 10.0})],
+            }
+            for partner, qty in zip(partners + partners[:2], (1, 2, 3, 4, 5, 6))
+        ])
+        domain = [('id', 'in', orders.ids)]
+
+        for rel_field in ('country_id', 'city'):
+            expected = self._read_and_merge(Order, domain, rel_field)
+            rows = _related_group_aggregates(Order, domain, 'partner_id', rel_field, 'amount_total')
+            self.assertEqual(len(rows), len(expected), rel_field)
+            for target, cnt, total in rows:
+                self.assertIn(target, expected, rel_field)
+                self.assertEqual(cnt, expected[target][0], rel_field)
+                self.assertAlmostEqual(float(total or 0.0), expected[target][1], 2, rel_field)
+
+            # the Top-N cut keeps the groups with the largest sums
+            top = _related_group_aggregates(Order, domain, 'partner_id', rel_field, 'amount_total', 1)
+            self.assertEqual(len(top), 1)
+            self.assertAlmostEqual(float(top[0][2]), max(v[1] for v in expected.values()), 2)